@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+# See LICENSE file for copyright and license details.
+# TUM CS Bot - https://github.com/ro-i/tumcsbot
+
+import sqlite3
+import tempfile
+import unittest
+
+from tumcsbot.lib import DB
+
+
+class DBTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self._prev_path = DB.path
+        DB.path = self._dir.name + "/test.db"
+
+    def tearDown(self) -> None:
+        DB.path = self._prev_path
+        self._dir.cleanup()
+
+    def test_pool_reuses_connections(self) -> None:
+        db: DB = DB()
+        connection = db.connection
+        db.close()
+        with DB() as db:
+            self.assertIs(db.connection, connection)
+            self.assertEqual(db.execute("pragma foreign_keys"), [(1,)])
+
+    def test_pool_discards_open_transaction(self) -> None:
+        with DB() as db:
+            db.checkout_table("Test", "(Key text primary key)")
+            db.execute("insert into Test values ('a')")
+        with DB() as db:
+            self.assertEqual(db.execute("select * from Test"), [])
+
+    def test_checkout_table(self) -> None:
+        with DB() as db:
+            db.checkout_table("Test", "(Key text primary key)")
+            db.execute("insert into Test values ('a')", commit=True)
+            db.checkout_table("Test", "(Key text primary key)")
+            self.assertEqual(db.execute("select * from Test"), [("a",)])
+            with self.assertRaises(ValueError):
+                db.checkout_table("Test; drop table Test", "(Key text)")
+
+    def test_execute_columns(self) -> None:
+        with DB() as db:
+            db.checkout_table("Test", "(Key text primary key, Value integer)")
+            self.assertEqual(
+                db.execute_columns("select * from Test"), {"Key": [], "Value": []}
+            )
+            db.execute("insert into Test values ('a', 1), ('b', 2)", commit=True)
+            self.assertEqual(
+                db.execute_columns("select * from Test order by Key"),
+                {"Key": ["a", "b"], "Value": [1, 2]},
+            )
+
+    def test_executemany(self) -> None:
+        with DB() as db:
+            db.checkout_table("Test", "(Key text primary key, Value integer)")
+            db.executemany(
+                "insert into Test values (?, ?)", [("a", 1), ("b", 2)], commit=True
+            )
+            self.assertFalse(db.connection.in_transaction)
+            self.assertEqual(db.execute("select * from Test"), [("a", 1), ("b", 2)])
+
+    def test_iter_execute(self) -> None:
+        with DB() as db:
+            db.checkout_table("Test", "(Key text primary key)")
+            db.execute("insert into Test values ('a'), ('b')", commit=True)
+            rows = []
+            for (key,) in db.iter_execute("select Key from Test order by Key"):
+                rows.append((key, db.execute("select count(*) from Test")[0][0]))
+            self.assertEqual(rows, [("a", 2), ("b", 2)])
+
+    def test_batch(self) -> None:
+        with DB() as db:
+            db.checkout_table("Test", "(Key text primary key)")
+            with db.batch():
+                db.execute("insert into Test values ('a')", commit=True)
+                with db.batch():
+                    db.execute("insert into Test values ('b')", commit=True)
+                self.assertTrue(db.connection.in_transaction)
+            self.assertFalse(db.connection.in_transaction)
+            with self.assertRaises(ValueError):
+                with db.batch():
+                    db.execute("insert into Test values ('c')", commit=True)
+                    raise ValueError()
+            self.assertEqual(db.execute("select * from Test"), [("a",), ("b",)])
+
+    def test_batch_write_lock(self) -> None:
+        with DB() as db:
+            db.checkout_table("Test", "(Key text primary key)")
+            other: DB = DB(db_path=DB.path, timeout=0)
+            with db.batch():
+                self.assertTrue(db.connection.in_transaction)
+                with self.assertRaises(sqlite3.OperationalError):
+                    other.execute("insert into Test values ('a')", commit=True)
+            other.execute("insert into Test values ('a')", commit=True)
+            other.close()
+            self.assertEqual(db.execute("select * from Test"), [("a",)])
+
+    def test_read_only(self) -> None:
+        with DB() as db:
+            db.checkout_table("Test", "(Key text primary key)")
+            db.execute("insert into Test values ('a')", commit=True)
+        with DB(read_only=True) as db:
+            self.assertEqual(db.execute("pragma foreign_keys"), [(1,)])
+            self.assertEqual(db.execute_columns("select * from Test"), {"Key": ["a"]})
+            with self.assertRaises(sqlite3.OperationalError):
+                db.execute("insert into Test values ('b')", commit=True)
+        self.assertTrue(db._closed)
+
+    def test_unpooled_connection(self) -> None:
+        db: DB = DB(db_path=DB.path, timeout=1)
+        connection = db.connection
+        db.close()
+        with DB() as db:
+            self.assertIsNot(db.connection, connection)
+        with DB(check_same_thread=True) as db:
+            self.assertFalse(db._pooled)
+        with DB(check_same_thread=False) as db:
+            self.assertTrue(db._pooled)
+
+    def test_pool_path_change(self) -> None:
+        db: DB = DB()
+        connection = db.connection
+        db.close()
+        DB.path = self._dir.name + "/other.db"
+        with DB() as db:
+            self.assertIsNot(db.connection, connection)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            connection.execute("select 1")
@@ -5,7 +5,7 @@
 
 import unittest
 
-from tumcsbot.lib import Regex
+from tumcsbot.lib import Regex, stream_name_match
 
 
 class RegexTest(unittest.TestCase):
@@ -72,6 +72,13 @@ class RegexTest(unittest.TestCase):
         self.assertEqual(Regex.get_stream_and_topic_name("#**>a**"), (">a", None))
         self.assertEqual(Regex.get_stream_and_topic_name("#**a>**"), ("a>", None))
 
+    def test_stream_name_match(self) -> None:
+        self.assertTrue(stream_name_match("abc.*", "ABCdef"))
+        self.assertFalse(stream_name_match("abc", "abcdef"))
+        self.assertIs(
+            Regex.get_stream_pattern("abc.*"), Regex.get_stream_pattern("abc.*")
+        )
+
     def test_user_names(self) -> None:
         for string, user_name in self.user_names:
             self.assertEqual(Regex.get_user_name(string), user_name)
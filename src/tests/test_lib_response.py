@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+# See LICENSE file for copyright and license details.
+# TUM CS Bot - https://github.com/ro-i/tumcsbot
+
+import unittest
+
+from typing import Any, cast
+
+from tumcsbot.lib import MessageEnvelope, MessageType, Response
+
+
+def get_envelope(response: Response) -> MessageEnvelope:
+    return cast(MessageEnvelope, response.response)
+
+
+class ResponseTest(unittest.TestCase):
+    private_message: dict[str, Any] = {
+        "id": 1,
+        "type": "private",
+        "sender_email": "abc@zulip.org",
+        "sender_full_name": "abc",
+    }
+
+    stream_message: dict[str, Any] = {
+        "id": 2,
+        "type": "stream",
+        "stream_id": 3,
+        "subject": "topic",
+        "sender_email": "abc@zulip.org",
+        "sender_full_name": "abc",
+    }
+
+    def test_build_message(self) -> None:
+        self.assertEqual(
+            get_envelope(Response.build_message(self.private_message, "foo")).as_dict(),
+            {"type": "private", "to": "abc@zulip.org", "subject": "", "content": "foo"},
+        )
+        self.assertEqual(
+            get_envelope(Response.build_message(self.stream_message, "foo")).as_dict(),
+            {"type": "stream", "to": 3, "subject": "topic", "content": "foo"},
+        )
+        self.assertEqual(
+            get_envelope(
+                Response.build_message(
+                    self.stream_message, "foo", msg_type="private", to=[1]
+                )
+            ).as_dict(),
+            {"type": "private", "to": [1], "subject": "", "content": "foo"},
+        )
+        self.assertEqual(
+            get_envelope(
+                Response.build_message(
+                    None, "foo", msg_type="stream", to="bar", subject="baz"
+                )
+            ).as_dict(),
+            {"type": "stream", "to": "bar", "subject": "baz", "content": "foo"},
+        )
+        self.assertTrue(
+            Response.build_message(None, "foo", msg_type="stream", to="bar").is_none()
+        )
+
+    def test_templates(self) -> None:
+        for method, template in [
+            (Response.privilege_err, Response.privilege_err_msg),
+            (Response.error, Response.error_msg),
+            (Response.exception, Response.exception_msg),
+            (Response.greet, Response.greet_msg),
+        ]:
+            response: Response = method(self.private_message)
+            self.assertEqual(response.message_type, MessageType.MESSAGE)
+            self.assertEqual(get_envelope(response).content, template.format("abc"))
+
+    def test_none(self) -> None:
+        response: Response = Response.none()
+        self.assertTrue(response.is_none())
+        self.assertIs(response, Response.none())
+        self.assertEqual(response.response, {})
+
+    def test_request_msg(self) -> None:
+        response: Response = Response.build_request_msg(self.private_message, "cmd")
+        self.assertEqual(
+            get_envelope(response).content,
+            Response.request_msg.format("abc", 1, "cmd"),
+        )
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+
+# See LICENSE file for copyright and license details.
+# TUM CS Bot - https://github.com/ro-i/tumcsbot
+
+import unittest
+
+from tumcsbot.plugins.help import Help
+
+
+class HelpTest(unittest.TestCase):
+    def test_format_description(self) -> None:
+        self.assertEqual(
+            Help._format_description("  foo   bar\t\tbaz  \n"), "foo bar\tbaz"
+        )
+
+    def test_format_description_nested_list(self) -> None:
+        description: str = (
+            "- `move <destination>`: move the        messages.\n"
+            "  - `stream_name` → `stream_name`\n"
+            "  - `#**stream_name**` → `stream_name`"
+        )
+        self.assertEqual(
+            Help._format_description(description),
+            "- `move <destination>`: move the messages.\n"
+            "  - `stream_name` → `stream_name`\n"
+            "  - `#**stream_name**` → `stream_name`",
+        )
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+
+# See LICENSE file for copyright and license details.
+# TUM CS Bot - https://github.com/ro-i/tumcsbot
+
+import tempfile
+import unittest
+
+from tumcsbot.lib import DB
+from tumcsbot.plugins.unknown_command import UnknownCommand
+
+
+class UnknownCommandTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self._prev_path = DB.path
+        DB.path = self._dir.name + "/test.db"
+
+    def tearDown(self) -> None:
+        DB.path = self._prev_path
+        self._dir.cleanup()
+
+    def test_init_plugin(self) -> None:
+        with DB() as db:
+            db.checkout_table(
+                "Plugins", "(name text primary key, syntax text, description text)"
+            )
+            db.execute("insert into Plugins values ('help', '', '')", commit=True)
+        # Skip the thread setup, only the database part is of interest here.
+        plugin: UnknownCommand = UnknownCommand.__new__(UnknownCommand)
+        plugin._init_plugin()
+        self.assertEqual(list(plugin._command_names), ["help"])
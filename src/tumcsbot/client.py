@@ -15,7 +15,14 @@ from typing import cast, Any, Callable, IO, Iterable, Sequence
 
 from zulip import Client as ZulipClient
 
-from tumcsbot.lib import stream_names_equal, DB, Response, MessageType, Regex
+from tumcsbot.lib import (
+    stream_names_equal,
+    DB,
+    MessageEnvelope,
+    Response,
+    MessageType,
+    Regex,
+)
 
 
 def synchronized(lock: RLock) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
@@ -44,6 +51,8 @@ class Client(ZulipClient):
     get_raw_message           Adapt original code and add apply_markdown.
     get_streams_from_regex    Get the names of all public streams
                               matching a regex.
+    get_streams_from_regexes  Get the names of all public streams
+                              matching some regexes.
     get_stream_name           Get stream name for provided stream id.
     get_user_ids_from_attribute
         Get the user ids from a given user attribute.
@@ -181,17 +190,32 @@ class Client(ZulipClient):
 
         Return an empty list if the regex is not valid.
         """
-        if not regex:
-            return []
+        return self.get_streams_from_regexes([regex])
 
-        try:
-            pat: re.Pattern[str] = re.compile(regex, flags=re.I)
-        except re.error:
+    def get_streams_from_regexes(self, regexes: Iterable[str]) -> list[str]:
+        """Get the names of all public streams matching some regexes.
+
+        Same as get_streams_from_regex, but the stream names are only
+        fetched once. The result contains the matches of every regex,
+        in the order of the regexes. Invalid regexes are skipped.
+        """
+        pats: list[re.Pattern[str]] = []
+        for regex in regexes:
+            if not regex:
+                continue
+            try:
+                pats.append(Regex.get_stream_pattern(regex))
+            except re.error:
+                continue
+        if not pats:
             return []
 
+        stream_names: list[str] = self.get_public_stream_names()
+
         return [
             stream_name
-            for stream_name in self.get_public_stream_names()
+            for pat in pats
+            for stream_name in stream_names
             if pat.fullmatch(stream_name)
         ]
 
@@ -326,12 +350,14 @@ class Client(ZulipClient):
 
     def send_response(self, response: Response) -> dict[str, Any]:
         """Send one single response."""
-        logging.debug("send_response: %s", str(response))
+        logging.debug("send_response: %s", response)
 
         if response.message_type == MessageType.MESSAGE:
-            return self.send_message(response.response)
+            return self.send_message(
+                cast(MessageEnvelope, response.response).as_dict()
+            )
         if response.message_type == MessageType.EMOJI:
-            return self.add_reaction(response.response)
+            return self.add_reaction(cast(dict[str, Any], response.response))
         return {}
 
     def send_responses(
@@ -752,6 +778,10 @@ class SharedClient:
     def get_streams_from_regex(self, regex: str) -> list[str]:
         return self._client.get_streams_from_regex(regex)
 
+    @synchronized(_shared_client_lock)
+    def get_streams_from_regexes(self, regexes: Iterable[str]) -> list[str]:
+        return self._client.get_streams_from_regexes(regexes)
+
     @synchronized(_shared_client_lock)
     def get_user_ids_from_active_status(self, active: bool = True) -> list[int] | None:
         return self._client.get_user_ids_from_active_status(active=active)
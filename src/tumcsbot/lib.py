@@ -12,6 +12,7 @@ Regex           Some widely used regex methods.
 CommandParser   A simple positional argument parser.
 Conf            Manage the bot's configuration variables.
 DB              Simple sqlite wrapper.
+MessageEnvelope A message to be sent to Zulip.
 Response        Provide Response building methods.
 
 Functions:
@@ -21,17 +22,34 @@ stream_names_equal  Decide whether two stream names are equal.
 """
 
 import json
+import os
+import queue
 import re
 import regex
 import shlex
 import sqlite3 as sqlite
+import sys
 from argparse import Namespace
+from contextlib import contextmanager
 from enum import Enum
+from functools import lru_cache
 from importlib import import_module
 from inspect import cleandoc, getmembers, isclass, ismodule
 from itertools import repeat
 from os.path import isabs
-from typing import Any, Callable, Final, Iterable, Type, TypeVar, cast
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Final,
+    Iterable,
+    Iterator,
+    Mapping,
+    Type,
+    TypeVar,
+    cast,
+)
 
 
 T = TypeVar("T")
@@ -89,7 +107,9 @@ class Regex:
     )
 
     _ASTERISKS: Final[re.Pattern[str]] = re.compile(r"(?:\*\*)")
-    _OPT_ASTERISKS: Final[re.Pattern[str]] = re.compile(r"(?:{}|)".format(_ASTERISKS))
+    _OPT_ASTERISKS: Final[re.Pattern[str]] = re.compile(
+        r"(?:{}|)".format(_ASTERISKS.pattern)
+    )
     _EMOJI: Final[re.Pattern[str]] = re.compile(r"[^:]+")
     _EMOJI_AUTOCOMPLETED_CAPTURE: Final[re.Pattern[str]] = re.compile(
         r":({}):".format(_EMOJI.pattern)
@@ -262,6 +282,18 @@ class Regex:
             return (result[0], None)
         return (result[0], int(result[1]))
 
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def get_stream_pattern(stream_reg: str) -> re.Pattern[str]:
+        """Compile a regex matching stream names.
+
+        Stream names are matched case insensitively, see
+        stream_name_match(). Since the same user-provided regexes are
+        used over and over again, the compiled patterns are cached.
+        Raise re.error if the regex is invalid.
+        """
+        return re.compile(stream_reg, flags=re.I)
+
     @staticmethod
     def match_user_argument(s: str) -> str:
         if Regex._USER_ARGUMENT_PATTERN.match(s):
@@ -685,9 +717,31 @@ class Conf:
 
 
 class DB:
-    """Simple wrapper class to conveniently access a sqlite database."""
+    """Simple wrapper class to conveniently access a sqlite database.
+
+    Connections to the default database are kept in a small per-process
+    pool and handed out again to later instances, see close().
+    """
 
     path: str | None = None
+    # Maximum number of idle connections kept in the pool.
+    pool_size: int = 8
+    _pool: "queue.LifoQueue[sqlite.Connection]" = queue.LifoQueue(pool_size)
+    # The (process id, database path) the pooled connections belong to.
+    _pool_owner: tuple[int, str | None] = (os.getpid(), None)
+    # Pools inherited from the parent process. Their connections must not
+    # even be closed in the child, so just keep a reference to them.
+    _foreign_pools: "list[queue.LifoQueue[sqlite.Connection]]" = []
+    _pragmas: Final[list[str]] = [
+        "pragma foreign_keys = on",
+        "pragma journal_mode = wal",
+        "pragma synchronous = normal",
+        "pragma cache_size = -64000",
+        "pragma temp_store = memory",
+    ]
+    _table_exists_sql: Final[
+        str
+    ] = "select 1 from sqlite_master where type = 'table' and name = ? limit 1"
 
     def __init__(
         self,
@@ -704,7 +758,16 @@ class DB:
         read_only     Opens a read-only database connection.
 
         *args and **kwargs are forwarded to sqlite.connect().
+        If none of the arguments is given (except for
+        `check_same_thread=False`, which all pooled connections use),
+        the connection is taken from the pool.
         """
+        self._pooled: bool = (
+            not db_path
+            and not read_only
+            and not args
+            and kwargs in ({}, {"check_same_thread": False})
+        )
         if not db_path:
             if not DB.path:
                 raise ValueError("no path to database given")
@@ -712,18 +775,94 @@ class DB:
         if not isabs(db_path):
             raise ValueError("path to database is not absolute")
 
+        self._db_path: str = db_path
         self.read_only: bool = read_only
-        if self.read_only:
+        if self._pooled:
+            self.connection = self._get_pooled_connection(db_path)
+        elif self.read_only:
             kwargs.update(uri=True)
             self.connection = sqlite.connect(
                 "file:" + db_path + "?mode=ro", *args, **kwargs
             )
+            # Switch on foreign key support.
+            self.connection.execute("pragma foreign_keys = on")
         else:
-            self.connection = sqlite.connect(db_path, *args, **kwargs)
+            self.connection = self._make_connection(db_path, *args, **kwargs)
 
         self.cursor = self.connection.cursor()
-        # Switch on foreign key support.
-        self.execute("pragma foreign_keys = on")
+        self._closed: bool = False
+        self._batch_depth: int = 0
+
+    def __enter__(self) -> "DB":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    @contextmanager
+    def batch(self) -> Iterator["DB"]:
+        """Group several statements into a single transaction.
+
+        Commits requested by execute() are deferred until the outermost
+        batch ends. Then, everything is committed at once, or rolled
+        back if an exception occurred.
+        The outermost batch takes SQLite's write lock right away. So
+        concurrent writers (other threads or plugin processes) wait for
+        the batch to finish instead of failing to upgrade their lock
+        halfway through their own transaction.
+        """
+        if (
+            not self._batch_depth
+            and not self.read_only
+            and not self.connection.in_transaction
+        ):
+            self.connection.execute("begin immediate")
+        self._batch_depth += 1
+        try:
+            yield self
+        except:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.connection.rollback()
+            raise
+        self._batch_depth -= 1
+        if not self._batch_depth and not self.read_only:
+            self.connection.commit()
+
+    @classmethod
+    def _get_pooled_connection(cls, db_path: str) -> sqlite.Connection:
+        """Get an idle connection from the pool or open a new one.
+
+        Pooled connections may be passed between threads, but never
+        between processes. A forked plugin process therefore starts
+        with a fresh pool.
+        """
+        if cls._pool_owner != (os.getpid(), db_path):
+            if cls._pool_owner[0] != os.getpid():
+                DB._foreign_pools.append(cls._pool)
+            else:
+                # Only the database path changed, so the idle connections
+                # are ours to close.
+                while True:
+                    try:
+                        cls._pool.get_nowait().close()
+                    except queue.Empty:
+                        break
+            DB._pool = queue.LifoQueue(cls.pool_size)
+            DB._pool_owner = (os.getpid(), db_path)
+        try:
+            return cls._pool.get_nowait()
+        except queue.Empty:
+            return cls._make_connection(db_path, check_same_thread=False)
+
+    @classmethod
+    def _make_connection(
+        cls, db_path: str, *args: Any, **kwargs: Any
+    ) -> sqlite.Connection:
+        connection: sqlite.Connection = sqlite.connect(db_path, *args, **kwargs)
+        for pragma in cls._pragmas:
+            connection.execute(pragma)
+        return connection
 
     def checkout_table(self, table: str, schema: str) -> None:
         """Create table if it does not already exist.
@@ -734,12 +873,34 @@ class DB:
         schema  schema of the table in the form of
                     '(Name Type, ...)' --> valid SQL!
 
-        Since this is only for internal use, screw SQL injections :)
+        The table name has to be a plain identifier. Since the schema
+        is only for internal use, it is not validated.
         """
+        if not re.fullmatch(r"\w+", table):
+            raise ValueError(f"invalid table name: {table}")
+        if self.cursor.execute(self._table_exists_sql, (table,)).fetchone():
+            return
         self.execute(f"create table if not exists {table} {schema};", commit=True)
 
     def close(self) -> None:
-        self.connection.close()
+        """Close the database connection.
+
+        Pooled connections are returned to the pool instead of being
+        closed, unless the pool is already full.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if not self._pooled or DB._pool_owner != (os.getpid(), self._db_path):
+            self.connection.close()
+            return
+        self.cursor.close()
+        if self.connection.in_transaction:
+            self.connection.rollback()
+        try:
+            DB._pool.put_nowait(self.connection)
+        except queue.Full:
+            self.connection.close()
 
     def execute(
         self, command: str, *args: Any, commit: bool = False
@@ -747,7 +908,8 @@ class DB:
         """Execute an sql command.
 
         Execute an sql command, save the new database state
-        (if commit == True) and return the result of the command.
+        (if commit == True and not inside of batch()) and return the
+        result of the command.
         Forward 'args' to cursor.execute()
         """
         try:
@@ -755,10 +917,91 @@ class DB:
         except sqlite.Error as e:
             self.connection.rollback()
             raise e
-        if commit and not self.read_only:
+        # Only commit if the command actually opened a transaction, i.e.,
+        # modified the database. This also covers read-only connections.
+        if commit and not self._batch_depth and self.connection.in_transaction:
             self.connection.commit()
         return result.fetchall()
 
+    def executemany(
+        self, command: str, args: Iterable[tuple[Any, ...]], commit: bool = False
+    ) -> None:
+        """Execute an sql command for every parameter sequence in 'args'.
+
+        Save the new database state (if commit == True and not inside of
+        batch()).
+        """
+        try:
+            self.cursor.executemany(command, args)
+        except sqlite.Error as e:
+            self.connection.rollback()
+            raise e
+        if commit and not self._batch_depth and self.connection.in_transaction:
+            self.connection.commit()
+
+    def execute_columns(self, command: str, *args: Any) -> dict[str, list[Any]]:
+        """Execute an sql query and return the result column by column.
+
+        Return a dict mapping every column name of the result to the
+        list of values of this column.
+        Forward 'args' to cursor.execute()
+        """
+        rows: list[tuple[Any, ...]] = self.execute(command, *args)
+        names: list[str] = [column[0] for column in self.cursor.description]
+        columns: list[tuple[Any, ...]] = list(zip(*rows)) if rows else [()] * len(names)
+        return {name: list(column) for name, column in zip(names, columns)}
+
+    def iter_execute(self, command: str, *args: Any) -> Iterator[tuple[Any, ...]]:
+        """Execute an sql query and iterate over the resulting rows.
+
+        Contrary to execute(), the rows are fetched lazily. The query
+        gets its own cursor, so execute() may be used while iterating.
+        Forward 'args' to cursor.execute()
+        """
+        cursor: sqlite.Cursor = self.connection.cursor()
+        try:
+            yield from cursor.execute(command, args)
+        finally:
+            cursor.close()
+
+
+class MessageEnvelope:
+    """A message to be sent to Zulip.
+
+    See https://zulip.com/api/send-message for the meaning of the
+    attributes. Use as_dict() to get the request for the Zulip API.
+    """
+
+    __slots__ = ("type", "to", "subject", "content")
+
+    def __init__(
+        self,
+        type: str,
+        to: str | int | list[int] | list[str],
+        content: str,
+        subject: str | None = "",
+    ) -> None:
+        self.type: str = type
+        self.to: str | int | list[int] | list[str] = to
+        self.subject: str | None = subject
+        self.content: str = content
+
+    def __repr__(self) -> str:
+        return str(self.as_dict())
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "type": self.type,
+            "to": self.to,
+            "subject": self.subject,
+            "content": self.content,
+        }
+
+
+# Emoji names of the most frequent reactions.
+_OK_EMOJI: Final[str] = sys.intern("ok")
+_NO_EMOJI: Final[str] = sys.intern("cross_mark")
+
 
 class Response:
     """Some useful methods for building a response message."""
@@ -798,12 +1041,26 @@ class Response:
         """
     )
     greet_msg: str = "Hi {}! :-)"
-    ok_emoji: str = "ok"
-    no_emoji: str = "cross_mark"
+    # The templates above containing a single "{}", split up once so that
+    # filling in a user name does not require str.format at runtime.
+    _privilege_err_parts: Final[tuple[str, str, str]] = privilege_err_msg.partition(
+        "{}"
+    )
+    _exception_parts: Final[tuple[str, str, str]] = exception_msg.partition("{}")
+    _error_parts: Final[tuple[str, str, str]] = error_msg.partition("{}")
+    _greet_parts: Final[tuple[str, str, str]] = greet_msg.partition("{}")
+    # Same for the request template, which has three placeholders.
+    _request_parts: Final[list[str]] = request_msg.split("{}")
+    ok_emoji: str = _OK_EMOJI
+    no_emoji: str = _NO_EMOJI
+    # Shared instance returned by none(), set up below the class body.
+    _none_response: ClassVar["Response"]
 
-    def __init__(self, message_type: MessageType, response: dict[str, Any]) -> None:
+    def __init__(
+        self, message_type: MessageType, response: Mapping[str, Any] | MessageEnvelope
+    ) -> None:
         self.message_type: MessageType = message_type
-        self.response: dict[str, Any] = response
+        self.response: Mapping[str, Any] | MessageEnvelope = response
 
     def __repr__(self) -> str:
         return self.__str__()
@@ -852,27 +1109,39 @@ class Response:
 
         Return a Response object.
         """
-        if message is None and (
-            msg_type is None or to is None or (msg_type == "stream" and subject is None)
-        ):
-            return cls.none()
-
-        if message is not None:
-            if msg_type is None:
-                msg_type = message["type"]
-            private: bool = msg_type == "private"
-
-            if to is None:
-                to = message["sender_email"] if private else message["stream_id"]
-
-            if subject is None:
-                subject = message["subject"] if not private else ""
+        if message is None:
+            if (
+                msg_type is None
+                or to is None
+                or (msg_type == "stream" and subject is None)
+            ):
+                return cls.none()
+        elif (msg_type or message["type"]) == "private":
+            # 'subject' field is ignored for private messages
+            # see https://zulip.com/api/send-message#parameter-topic
+            return cls(
+                MessageType.MESSAGE,
+                MessageEnvelope(
+                    "private",
+                    message["sender_email"] if to is None else to,
+                    content,
+                    "" if subject is None else subject,
+                ),
+            )
+        else:
+            return cls(
+                MessageType.MESSAGE,
+                MessageEnvelope(
+                    msg_type or message["type"],
+                    message["stream_id"] if to is None else to,
+                    content,
+                    message["subject"] if subject is None else subject,
+                ),
+            )
 
-        # 'subject' field is ignored for private messages
-        # see https://zulip.com/api/send-message#parameter-topic
         return cls(
             MessageType.MESSAGE,
-            {"type": msg_type, "to": to, "subject": subject, "content": content},
+            MessageEnvelope(msg_type, to, content, subject),
         )
 
     @classmethod
@@ -909,9 +1178,16 @@ class Response:
         command     The command that would have been executed, given
                     the message.
         """
+        parts: list[str] = cls._request_parts
         return cls.build_message(
             message,
-            cls.request_msg.format(message["sender_full_name"], message["id"], command),
+            parts[0]
+            + message["sender_full_name"]
+            + parts[1]
+            + str(message["id"])
+            + parts[2]
+            + command
+            + parts[3],
         )
 
     @classmethod
@@ -921,8 +1197,9 @@ class Response:
         Tell the user that they have not sufficient privileges for a
         certain command.
         """
+        parts: tuple[str, str, str] = cls._privilege_err_parts
         return cls.build_message(
-            message, cls.privilege_err_msg.format(message["sender_full_name"])
+            message, parts[0] + message["sender_full_name"] + parts[2]
         )
 
     @classmethod
@@ -933,38 +1210,50 @@ class Response:
     @classmethod
     def error(cls, message: dict[str, Any]) -> "Response":
         """Tell the user that an error occurred."""
+        parts: tuple[str, str, str] = cls._error_parts
         return cls.build_message(
-            message, cls.error_msg.format(message["sender_full_name"])
+            message, parts[0] + message["sender_full_name"] + parts[2]
         )
 
     @classmethod
     def exception(cls, message: dict[str, Any]) -> "Response":
         """Tell the user that an exception occurred."""
+        parts: tuple[str, str, str] = cls._exception_parts
         return cls.build_message(
-            message, cls.exception_msg.format(message["sender_full_name"])
+            message, parts[0] + message["sender_full_name"] + parts[2]
         )
 
     @classmethod
     def greet(cls, message: dict[str, Any]) -> "Response":
         """Greet the user."""
+        parts: tuple[str, str, str] = cls._greet_parts
         return cls.build_message(
-            message, cls.greet_msg.format(message["sender_full_name"])
+            message, parts[0] + message["sender_full_name"] + parts[2]
         )
 
     @classmethod
     def ok(cls, message: dict[str, Any]) -> "Response":
         """Return an "ok"-reaction."""
-        return cls.build_reaction(message, cls.ok_emoji)
+        return cls(
+            MessageType.EMOJI,
+            {"message_id": message["id"], "emoji_name": _OK_EMOJI},
+        )
 
     @classmethod
     def no(cls, message: dict[str, Any]) -> "Response":
         """Return a "no"-reaction."""
-        return cls.build_reaction(message, cls.no_emoji)
+        return cls(
+            MessageType.EMOJI,
+            {"message_id": message["id"], "emoji_name": _NO_EMOJI},
+        )
 
     @classmethod
     def none(cls) -> "Response":
         """No response."""
-        return cls(MessageType.NONE, {})
+        return cls._none_response
+
+
+Response._none_response = Response(MessageType.NONE, MappingProxyType({}))
 
 
 def get_classes_from_path(module_path: str, class_type: Type[T]) -> Iterable[Type[T]]:
@@ -1074,7 +1363,7 @@ def stream_name_match(stream_reg: str, stream_name: str) -> bool:
 
     Currently, Zulip considers stream names to be case insensitive.
     """
-    return re.fullmatch(stream_reg, stream_name, flags=re.I) is not None
+    return Regex.get_stream_pattern(stream_reg).fullmatch(stream_name) is not None
 
 
 def validate_and_return_regex(regex: str | None) -> str | None:
@@ -24,7 +24,7 @@ import queue
 from abc import ABC, abstractmethod
 import signal
 from threading import Thread
-from typing import Any, Callable, Final, Iterable, Type, cast, final
+from typing import Any, Callable, Final, Iterable, cast, final
 
 from tumcsbot.client import Client, SharedClient
 from tumcsbot.lib import DB, LOGGING_FORMAT, Response, StrEnum
@@ -179,9 +179,10 @@ class _Plugin(ABC):
         self._init_db()
 
     def _init_db(self) -> None:
-        db: DB = DB()
-        db.execute(self._update_plugin_sql, self.plugin_name(), None, None, commit=True)
-        db.close()
+        with DB() as db:
+            db.execute(
+                self._update_plugin_sql, self.plugin_name(), None, None, commit=True
+            )
 
     def _init_plugin(self) -> None:
         """Custom plugin initialization code.
@@ -429,9 +430,8 @@ class PluginCommandMixin(_Plugin):
 
     @final
     def _init_db(self) -> None:
-        db: DB = DB()
-        db.execute(self._update_plugin_sql, *self.get_usage(), commit=True)
-        db.close()
+        with DB() as db:
+            db.execute(self._update_plugin_sql, *self.get_usage(), commit=True)
 
     def update_plugin_usage(self) -> None:
         self._init_db()
@@ -493,17 +493,3 @@ class PluginCommandMixin(_Plugin):
             and "command_name" in event.data["message"]
             and event.data["message"]["command_name"] == self.plugin_name()
         )
-
-
-def get_zulip_events_from_plugins(
-    plugins: Iterable[_Plugin] | Iterable[Type[_Plugin]],
-) -> list[str]:
-    """Get all Zulip events to listen to from the plugins.
-
-    Every plugin decides on its own which events it likes to receive.
-    The plugins passed to this function may be classes or instances.
-    """
-    events: set[str] = set()
-    for plugin in plugins:
-        events.update(plugin.zulip_events)
-    return list(events)
@@ -73,7 +73,7 @@ class AlertWord(PluginCommandMixin, PluginProcess):
         bindings: list[tuple[re.Pattern[str], str]] = []
 
         # Verify every regex and only use the valid ones.
-        for regex, emoji in self._db.execute(self._select_sql):
+        for regex, emoji in self._db.iter_execute(self._select_sql):
             try:
                 pattern: re.Pattern[str] = re.compile(regex)
             except re.error:
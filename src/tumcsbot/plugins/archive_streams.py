@@ -124,8 +124,4 @@ class ArchiveStreams(PluginCommandMixin, PluginThread):
         )
 
     def _get_streams_from_regexes(self, stream_regs: list[str]) -> list[str]:
-        return [
-            stream
-            for stream_reg in stream_regs
-            for stream in self.client.get_streams_from_regex(stream_reg)
-        ]
+        return self.client.get_streams_from_regexes(stream_regs)
@@ -21,9 +21,8 @@ from tumcsbot.plugin import Event, PluginThread
 
 class AutoSubscriber(PluginThread):
     zulip_events = ["stream"]
-    _insert_sql: str = "insert or ignore into PublicStreams values (?, 0)"
+    _insert_sql: str = "insert or replace into PublicStreams values (?, ?)"
     _select_sql: str = "select StreamName, Subscribed from PublicStreams"
-    _subscribe_sql: str = "update PublicStreams set Subscribed = 1 where StreamName = ?"
     _remove_sql: str = "delete from PublicStreams where StreamName = ?"
 
     def _init_plugin(self) -> None:
@@ -75,19 +74,17 @@ class AutoSubscriber(PluginThread):
             self._remove_stream_from_table(stream_name)
             return
 
+        # Subscribe first, so that the database only needs to be written
+        # once (and not while waiting for the Zulip server).
+        subscribed: bool = self.client.subscribe_users([self.client.id], stream_name)
+        if not subscribed:
+            self.logger.warning("could not subscribe to %s", stream_name)
+
         try:
-            self._db.execute(self._insert_sql, stream_name, commit=True)
+            self._db.execute(self._insert_sql, stream_name, subscribed, commit=True)
         except Exception as e:
             self.logger.exception(e)
 
-        if self.client.subscribe_users([self.client.id], stream_name):
-            try:
-                self._db.execute(self._subscribe_sql, stream_name, commit=True)
-            except Exception as e:
-                self.logger.exception(e)
-        else:
-            self.logger.warning("could not subscribe to %s", stream_name)
-
     def _remove_stream_from_table(self, stream_name: str) -> None:
         """Remove the given stream name from the PublicStreams table."""
         try:
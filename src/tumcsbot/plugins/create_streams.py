@@ -46,15 +46,28 @@ class CreateStreams(PluginCommandMixin, PluginThread):
         if stream_tuples is None or None in stream_tuples:
             return Response.error(message)
 
+        streams: list[dict[str, str]] = []
         for stream, desc in stream_tuples:
             if not stream:
                 failed.append("one empty stream name")
                 continue
-            result: dict[str, Any] = self.client.add_subscriptions(
-                streams=[{"name": stream, "description": desc}]
-            )
-            if result["result"] != "success":
-                failed.append(f"stream: {stream}, description: {desc}")
+            streams.append({"name": stream, "description": desc})
+
+        # Try to create all streams at once. Only if this fails, create
+        # them one by one in order to find out which ones are affected.
+        if (
+            streams
+            and self.client.add_subscriptions(streams=streams)["result"] != "success"
+        ):
+            for stream_dict in streams:
+                result: dict[str, Any] = self.client.add_subscriptions(
+                    streams=[stream_dict]
+                )
+                if result["result"] != "success":
+                    failed.append(
+                        f"stream: {stream_dict['name']}, "
+                        f"description: {stream_dict['description']}"
+                    )
 
         if not failed:
             return Response.ok(message)
@@ -7,6 +7,7 @@ from collections.abc import Iterable as IterableClass
 from inspect import cleandoc
 import re
 from sqlite3 import IntegrityError
+import time
 from typing import cast, Any, Callable, Iterable
 
 from tumcsbot.lib import stream_name_match, CommandParser, DB, Regex, Response
@@ -121,22 +122,29 @@ class Group(PluginCommandMixin, PluginProcess):
     _get_claims_for_all_sql: str = "select MessageId from GroupClaimsAll"
     _get_claims_for_group: str = "select MessageId from GroupClaims where GroupId = ?"
     _get_emoji_from_group_sql: str = "select Emoji from Groups where Id = ?"
-    _get_group_from_emoji_sql: str = "select Id from Groups where Emoji = ?"
+    _get_groups_by_emoji_sql: str = "select Emoji, Id from Groups"
+    # Maximum age (in seconds) of the cached emoji -> group id mapping.
+    # Changes by this plugin invalidate the cache immediately, the timeout
+    # only covers external changes to the database.
+    _groups_by_emoji_ttl: float = 30
     _get_group_subscribers_sql: str = "select UserId from GroupUsers where GroupId = ?"
     _get_streams_sql: str = "select Streams from Groups where Id = ? collate nocase"
     _get_streams_from_user_sql: str = (
         "select Streams from Groups join GroupUsers on Id = GroupId where UserId = ?"
     )
+    _create_group_users_index_sql: str = (
+        "create index if not exists GroupUsersGroupId on GroupUsers (GroupId)"
+    )
     _insert_sql: str = "insert into Groups values (?,?,?)"
     _is_group_claimed_by_msg_sql: str = (
-        "select * from GroupClaims where GroupId = ? and MessageId = ?"
+        "select 1 from GroupClaims where GroupId = ? and MessageId = ? limit 1"
     )
     _is_message_announcement_sql: str = (
-        "select * from GroupClaimsAll where MessageId = ?"
+        "select 1 from GroupClaimsAll where MessageId = ? limit 1"
     )
     _list_sql: str = "select * from Groups"
     _remove_sql: str = "delete from Groups where Id = ? collate nocase"
-    _subscribe_user_sql: str = "insert into GroupUsers values (?,?)"
+    _subscribe_user_sql: str = "insert or ignore into GroupUsers values (?,?)"
     _update_streams_sql: str = (
         "update Groups set Streams = ? where Id = ? collate nocase"
     )
@@ -173,6 +181,8 @@ class Group(PluginCommandMixin, PluginProcess):
             ),
         )
         self._db.checkout_table("GroupClaimsAll", "(MessageId integer primary key)")
+        # The primary key of GroupUsers does not cover lookups by group.
+        self._db.execute(self._create_group_users_index_sql, commit=True)
 
         # Init command parsing.
         self.command_parser = CommandParser()
@@ -210,6 +220,9 @@ class Group(PluginCommandMixin, PluginProcess):
         self.message_link: str = (
             "[{0}](" + self.client.base_url[:-4] + "#narrow/id/{0})"
         )
+        # Cache for _get_groups_by_emoji().
+        self._groups_by_emoji: dict[str, str] | None = None
+        self._groups_by_emoji_time: float = 0
 
     def handle_zulip_event(self, event: Event) -> Response | Iterable[Response]:
         if event.data["type"] == "reaction":
@@ -299,13 +312,23 @@ class Group(PluginCommandMixin, PluginProcess):
     def handle_stream_event(
         self, event: dict[str, Any]
     ) -> Response | Iterable[Response]:
+        # New streams which have to be subscribed by the same set of users
+        # are handled with a single request.
+        streams_by_users: dict[frozenset[int], list[tuple[str, str | None]]] = {}
+
         for stream in event["streams"]:
             # Get all the groups this stream belongs to.
             group_ids: list[str] = self._get_group_ids_from_stream(stream["name"])
-            # Get all user ids to subscribe to this new stream ...
+            # Get all user ids to subscribe to this new stream.
             user_ids: list[int] = self._get_group_subscribers(group_ids)
-            # ... and subscribe them.
-            self.client.subscribe_users(user_ids, stream["name"])
+            if user_ids:
+                streams_by_users.setdefault(frozenset(user_ids), []).append(
+                    (stream["name"], None)
+                )
+
+        # Subscribe them.
+        for users, streams in streams_by_users.items():
+            self.client.subscribe_users_multiple_streams(list(users), streams)
 
         return Response.none()
 
@@ -333,6 +356,7 @@ class Group(PluginCommandMixin, PluginProcess):
             self._db.execute(self._insert_sql, group_id, emoji, "", commit=True)
         except IntegrityError as e:
             return Response.build_message(message, str(e))
+        self._groups_by_emoji = None
 
         # Update the announcement messages.
         if not self._announcements_add_group(group_id):
@@ -418,7 +442,7 @@ class Group(PluginCommandMixin, PluginProcess):
     def _build_announcement_message(self) -> str:
         table: str = "\n".join(
             self._announcement_msg_table_row_fmt % (group_id, emoji)
-            for group_id, emoji, _ in self._db.execute(self._list_sql)
+            for group_id, emoji, _ in self._db.iter_execute(self._list_sql)
         )
 
         # Send own message.
@@ -562,10 +586,9 @@ class Group(PluginCommandMixin, PluginProcess):
     def _get_group_id_from_emoji_event(self, message_id: int, emoji: str) -> str | None:
         result_sql: list[tuple[Any, ...]]
 
-        result_sql = self._db.execute(self._get_group_from_emoji_sql, emoji)
-        if not result_sql:
+        group_id: str | None = self._get_groups_by_emoji().get(emoji)
+        if group_id is None:
             return None
-        group_id: str = cast(str, result_sql[0][0])
 
         # Check whether the message is claimed by this group.
         result_sql = self._db.execute(
@@ -576,11 +599,30 @@ class Group(PluginCommandMixin, PluginProcess):
 
         return group_id if result_sql else None
 
+    def _get_groups_by_emoji(self) -> dict[str, str]:
+        """Get a mapping of all group emojis to their group ids.
+
+        The mapping is cached, see _groups_by_emoji_ttl.
+        """
+        now: float = time.monotonic()
+        if (
+            self._groups_by_emoji is None
+            or now - self._groups_by_emoji_time > self._groups_by_emoji_ttl
+        ):
+            self._groups_by_emoji = dict(
+                cast(
+                    Iterable[tuple[str, str]],
+                    self._db.execute(self._get_groups_by_emoji_sql),
+                )
+            )
+            self._groups_by_emoji_time = now
+        return self._groups_by_emoji
+
     def _get_group_ids_from_stream(self, stream_name: str) -> list[str]:
         """Get the ids of the groups the given stream name belongs to."""
         result: list[str] = []
 
-        for group_id, _, stream_regs_str in self._db.execute(self._list_sql):
+        for group_id, _, stream_regs_str in self._db.iter_execute(self._list_sql):
             stream_regs: list[str] = stream_regs_str.split("\n")
             for stream_reg in stream_regs:
                 if not stream_name_match(stream_reg, stream_name):
@@ -619,11 +661,11 @@ class Group(PluginCommandMixin, PluginProcess):
 
     def _list(self, message: dict[str, Any]) -> Response | Iterable[Response]:
         """Command `group list`."""
-        response: str = (
+        response: list[str] = [
             "Group Id | Emoji | Streams | ClaimedBy\n---- | ---- | ---- | ----"
-        )
+        ]
 
-        for group_id, emoji, streams in self._db.execute(self._list_sql):
+        for group_id, emoji, streams in self._db.iter_execute(self._list_sql):
             streams_concat: str = ", ".join(f"'{s}'" for s in streams.split("\n"))
             claims: str = ", ".join(
                 [
@@ -633,16 +675,19 @@ class Group(PluginCommandMixin, PluginProcess):
                     )
                 ]
             )
-            response += (
+            response.append(
                 f"\n{group_id} | {emoji} :{emoji}: | `{streams_concat}` | {claims}"
             )
 
-        response += "\n\nMessages claimed for all groups: " + ", ".join(
-            self.message_link.format(msg_id)
-            for msg_id, in self._db.execute(self._get_claims_for_all_sql)
+        response.append(
+            "\n\nMessages claimed for all groups: "
+            + ", ".join(
+                self.message_link.format(msg_id)
+                for msg_id, in self._db.execute(self._get_claims_for_all_sql)
+            )
         )
 
-        return Response.build_message(message, response)
+        return Response.build_message(message, "".join(response))
 
     def _remove(
         self,
@@ -652,6 +697,7 @@ class Group(PluginCommandMixin, PluginProcess):
         msg_success: bool = self._announcements_remove_group(group_id)
 
         self._db.execute(self._remove_sql, group_id, commit=True)
+        self._groups_by_emoji = None
 
         if msg_success:
             return Response.ok(message)
@@ -665,12 +711,18 @@ class Group(PluginCommandMixin, PluginProcess):
     ) -> Response | Iterable[Response]:
         """Subscribe a user to a group."""
         msg: str
+        subscribed: bool
 
         try:
             self._db.execute(self._subscribe_user_sql, user_id, group_id, commit=True)
+            # Existing subscriptions are ignored by the insert statement.
+            subscribed = self._db.cursor.rowcount > 0
         except IntegrityError as e:
+            # The group does not exist.
             self.logger.exception(e)
-            # User already subscribed.
+            subscribed = False
+
+        if not subscribed:
             msg = f"I think you are already subscribed to group {group_id}."
             if message:
                 return Response.build_message(message, msg)
@@ -713,8 +765,7 @@ class Group(PluginCommandMixin, PluginProcess):
             user_ids=user_ids,
             streams=[
                 (name, None)
-                for stream_reg in stream_regs
-                for name in self.client.get_streams_from_regex(stream_reg)
+                for name in self.client.get_streams_from_regexes(stream_regs)
             ],
         )
 
@@ -766,18 +817,16 @@ class Group(PluginCommandMixin, PluginProcess):
         # Get the streams of the group we want to unsubscribe from.
         stream_regs_group: list[str] = self._get_stream_regs_from_group_id(group_id)
         streams_group: set[str] = set(
-            stream
-            for stream_reg in stream_regs_group
-            for stream in self.client.get_streams_from_regex(stream_reg)
+            self.client.get_streams_from_regexes(stream_regs_group)
         )
         # Get the streams of all the other groups this user might be subscribed to.
         stream_regs: list[tuple[Any, ...]] = self._db.execute(
             self._get_streams_from_user_sql, user_id
         )
         streams: set[str] = set(
-            stream
-            for (stream_reg,) in stream_regs
-            for stream in self.client.get_streams_from_regex(stream_reg)
+            self.client.get_streams_from_regexes(
+                stream_reg for (stream_reg,) in stream_regs
+            )
         )
         unsubscribe_streams: list[str] = list(streams_group - streams)
         # Make sure we do not unsubscribe from a stream which belongs to another
@@ -3,8 +3,10 @@
 # See LICENSE file for copyright and license details.
 # TUM CS Bot - https://github.com/ro-i/tumcsbot
 
+import re
 from inspect import cleandoc
-from typing import Any, Iterable
+from operator import itemgetter
+from typing import Any, Final, Iterable
 
 from tumcsbot.lib import DB, Response, get_classes_from_path
 from tumcsbot.plugin import PluginCommandMixin, _Plugin, PluginThread
@@ -39,10 +41,20 @@ class Help(PluginCommandMixin, PluginThread):
         Have a nice day! :-)
         """
     )
+    # Split at the two placeholders once instead of calling str.format.
+    _help_overview_parts: Final[list[str]] = _help_overview_template.split("{}")
     _get_usage_all_sql: str = "select name, syntax, description from Plugins"
     _get_usage_name_sql: str = (
         "select name, syntax, description from Plugins where name = ?"
     )
+    # Line continuations in the (cleandoc'ed) descriptions leave the source
+    # indentation behind, so collapse runs of horizontal whitespace following
+    # other text. Indentation at the start of a line is kept, because it
+    # nests markdown lists. The first two alternatives strip surrounding
+    # whitespace in the same pass.
+    _whitespace_pattern: Final[re.Pattern[str]] = re.compile(
+        r"\A\s+|\s+\Z|(?<=\S)( ) +|(?<=\S)(\t)\t+"
+    )
 
     def _init_plugin(self) -> None:
         self.help_info: list[tuple[str, str, str]] = self._get_help_info()
@@ -53,12 +65,10 @@ class Help(PluginCommandMixin, PluginThread):
             return self._help_overview(message)
         return self._help_command(message, command)
 
-    @staticmethod
-    def _format_description(description: str) -> str:
+    @classmethod
+    def _format_description(cls, description: str) -> str:
         """Format the usage description of a command."""
-        # Remove surrounding whitespace.
-        description.strip()
-        return description
+        return cls._whitespace_pattern.sub(r"\1\2", description)
 
     @staticmethod
     def _format_syntax(syntax: str) -> str:
@@ -70,16 +80,15 @@ class Help(PluginCommandMixin, PluginThread):
 
         Return a list of tuples (command name, syntax, description).
         """
-        db: DB = DB()
-        result_sql: list[tuple[Any, ...]] = db.execute(self._get_usage_all_sql)
-        db.close()
+        with DB() as db:
+            result_sql: list[tuple[Any, ...]] = db.execute(self._get_usage_all_sql)
         result: list[tuple[str, str, str]] = [
             (name, self._format_syntax(syntax), self._format_description(description))
             for name, syntax, description in result_sql
             if syntax is not None and description is not None
         ]
         # Sort by name.
-        return sorted(result, key=lambda tuple: tuple[0])
+        return sorted(result, key=itemgetter(0))
 
     def _help_command(
         self, message: dict[str, Any], command: str
@@ -101,6 +110,7 @@ class Help(PluginCommandMixin, PluginThread):
         )
 
     def _help_overview(self, message: dict[str, Any]) -> Response | Iterable[Response]:
+        parts: list[str] = self._help_overview_parts
         # Get the command names.
         help_message: str = "\n".join(
             map(lambda tuple: "- " + tuple[0], self.help_info)
@@ -108,9 +118,7 @@ class Help(PluginCommandMixin, PluginThread):
 
         return Response.build_message(
             message,
-            self._help_overview_template.format(
-                message["sender_full_name"], help_message
-            ),
+            parts[0] + message["sender_full_name"] + parts[1] + help_message + parts[2],
             msg_type="private",
             to=message["sender_email"],
         )
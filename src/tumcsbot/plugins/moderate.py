@@ -194,6 +194,10 @@ class Moderate(PluginCommandMixin, PluginThread):
 
     _list_authorized_streams_sql: str = "select a.StreamId from GroupAuthorization a, UserGroupMembers m where a.GroupId = m.GroupId and m.UserId = ?"
     _list_authorization_sql: str = "select * from GroupAuthorization"
+    _list_groups_members_sql: str = (
+        "select g.GroupId, g.UGroup, m.UserId from UserGroups g "
+        "left join UserGroupMembers m on m.GroupId = g.GroupId order by g.GroupId"
+    )
     _insert_authorization_sql: str = (
         "insert or ignore into GroupAuthorization values (?, ?)"
     )
@@ -842,22 +846,19 @@ class Moderate(PluginCommandMixin, PluginThread):
 
     # TODO: replacement for zulip usergroups. Rreplace as soon as api allows bot requests for usergroups
     def get_groups(self) -> list[dict[str, Any]]:
-        res_groups = self._db.execute("select * from UserGroups")
-        if res_groups is None:
-            return []
-
-        groups: list[dict[str, Any]] = []
-        for group_id, group_name in res_groups:
-            memers_res = self._db.execute(
-                "select m.UserId from UserGroups g, UserGroupMembers m where m.GroupId = ?",
-                group_id,
-            )
-            members: list[int] = []
-            if memers_res is not None:
-                members = [t[0] for t in memers_res]
-            groups.append({"id": group_id, "name": group_name, "members": members})
+        # Fetch all groups together with their members in a single query.
+        groups: dict[int, dict[str, Any]] = {}
+        for group_id, group_name, user_id in self._db.iter_execute(
+            self._list_groups_members_sql
+        ):
+            group: dict[str, Any] | None = groups.get(group_id)
+            if group is None:
+                group = {"id": group_id, "name": group_name, "members": []}
+                groups[group_id] = group
+            if user_id is not None:
+                group["members"].append(user_id)
 
-        return groups
+        return list(groups.values())
 
     def get_group_id_by_name(self, group_name: str) -> int | None:
         res = self._db.execute(
@@ -870,14 +871,8 @@ class Moderate(PluginCommandMixin, PluginThread):
 
     def group_id_by_identifier(self, identifier: int | str) -> int | None:
         if isinstance(identifier, int):
-            return int(identifier)
-        res = self._db.execute(
-            "select GroupId from UserGroups where UGroup = ? LIMIT 1", identifier
-        )
-        if not res or len(res) == 0:
-            return None
-        i: int = res[0][0]
-        return i
+            return identifier
+        return self.get_group_id_by_name(identifier)
 
     def get_group_by_identifier(self, identifier: int | str) -> dict[str, Any] | None:
         gid = self.group_id_by_identifier(identifier)
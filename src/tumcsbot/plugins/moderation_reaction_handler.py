@@ -19,6 +19,7 @@ import urllib
 
 
 class ModerationReactionHandler(PluginThread):
+    zulip_events = ["reaction"]
     # pylint: disable=line-too-long
     _replace_dict: dict[
         str, tuple[Callable[[dict[str, Any], dict[str, Any]], str], str]
@@ -86,8 +87,8 @@ class ModerationReactionHandler(PluginThread):
         self.client_id: int = self.client.id
 
     def is_responsible(self, event: Event) -> bool:
-        return super().is_responsible(event) or (
-            event.data["type"] == "reaction"
+        return (
+            super().is_responsible(event)
             and event.data["op"] == "add"
             and event.data["user_id"] != self.client_id
         )
@@ -59,10 +59,10 @@ class Msg(PluginCommandMixin, PluginThread):
         command, _, args = result
 
         if command == "list":
-            response: str = "***List of Identifiers and Messages***\n"
-            for ident, text in self._db.execute(self._list_sql):
-                response += f"\n--------\nTitle: **{ident}**\n{text}"
-            return Response.build_message(message, response)
+            response: list[str] = ["***List of Identifiers and Messages***\n"]
+            for ident, text in self._db.iter_execute(self._list_sql):
+                response.append(f"\n--------\nTitle: **{ident}**\n{text}")
+            return Response.build_message(message, "".join(response))
 
         # Use lowercase -> no need for case insensitivity.
         ident = args.id.lower()
@@ -33,10 +33,10 @@ class Repost(PluginThread):
 
     def reload(self) -> None:
         super().reload()
-        db: DB = DB()
-        result: list[tuple[Any, ...]] = db.execute(
-            "select value from Conf where Key = 'RepostEmoji'"
-        )
+        with DB() as db:
+            result: list[tuple[Any, ...]] = db.execute(
+                "select value from Conf where Key = 'RepostEmoji'"
+            )
         self._repost_emoji = None if not result else result[0][0]
 
     def handle_zulip_event(self, event: Event) -> Response | Iterable[Response]:
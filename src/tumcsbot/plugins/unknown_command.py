@@ -3,7 +3,7 @@
 # See LICENSE file for copyright and license details.
 # TUM CS Bot - https://github.com/ro-i/tumcsbot
 
-from typing import Final, Iterable, cast
+from typing import Final, Iterable
 
 from tumcsbot.lib import DB, Response, get_classes_from_path
 from tumcsbot.plugin import Event, PluginThread, _Plugin
@@ -23,9 +23,10 @@ class UnknownCommand(PluginThread):
     _select_sql: Final[str] = "select name from Plugins"
 
     def _init_plugin(self) -> None:
-        self._command_names: Iterable[str] = list(
-            map(lambda t: cast(str, t[0]), DB(read_only=True).execute(self._select_sql))
-        )
+        with DB(read_only=True) as db:
+            self._command_names: Iterable[str] = db.execute_columns(self._select_sql)[
+                "name"
+            ]
 
     def handle_zulip_event(self, event: Event) -> Response | Iterable[Response]:
         return Response.build_reaction(event.data["message"], "question")
@@ -18,18 +18,41 @@ from tumcsbot.plugin import PluginCommandMixin, PluginThread
 
 
 class Usergroup(PluginCommandMixin, PluginThread):
-    _remove_group_sql: str = "delete from UserGroups where UGroup = ?"
-    _remove_user_from_group_sql: str = (
-        "delete from UserGroups where UGroup = ? and UserId = ?"
+    _create_members_index_sql: str = (
+        "create index if not exists UserGroupMembersUserId "
+        "on UserGroupMembers (UserId)"
     )
     _list_sql: str = "select * from UserGroups"
-    _list_user_sql: str = "select UGroup from UserGroups where UserId = ?"
-    _insert_sql: str = "insert or ignore into UserGroups (UGroup, UserId) values (?, ?)"
-    _delete_sql: str = "delete from UserGroups where "
-
+    _list_groups_members_sql: str = (
+        "select g.GroupId, g.UGroup, m.UserId from UserGroups g "
+        "left join UserGroupMembers m on m.GroupId = g.GroupId order by g.GroupId"
+    )
+    _list_user_groups_sql: str = (
+        "select g.GroupId from UserGroups g join UserGroupMembers m "
+        "on m.GroupId = g.GroupId where m.UserId = ?"
+    )
+    _list_user_group_names_sql: str = (
+        "select g.UGroup from UserGroups g join UserGroupMembers m "
+        "on m.GroupId = g.GroupId where m.UserId = ?"
+    )
+    _get_group_id_sql: str = "select GroupId from UserGroups where UGroup = ? limit 1"
+    _get_group_name_sql: str = "select UGroup from UserGroups where GroupId = ? limit 1"
+    _get_group_members_sql: str = "select UserId from UserGroupMembers where GroupId = ?"
     _create_group_sql: str = "insert or ignore into UserGroups (UGroup) values (?)"
-    _get_group_id_sql: str = "select GroupId from UserGroups where UGroup = ?"
-    # _get_groups_for_
+    _remove_group_sql: str = "delete from UserGroups where GroupId = ?"
+    _remove_group_members_sql: str = "delete from UserGroupMembers where GroupId = ?"
+    _insert_member_sql: str = "insert or ignore into UserGroupMembers values (?, ?)"
+    _remove_member_sql: str = (
+        "delete from UserGroupMembers where GroupId = ? and UserId = ?"
+    )
+    _remove_user_from_all_sql: str = "delete from UserGroupMembers where UserId = ?"
+
+    _notification_msg: str = "Hey,\nYou have been {} by @_**{}|{}**:\n{}"
+    _notification_actions: dict[str, str] = {
+        "add": "added to the following user groups",
+        "remove": "removed from the following user group",
+        "remove_all": "removed from the following user groups",
+    }
 
     def _init_plugin(self) -> None:
         # Get own database connection.
@@ -43,6 +66,8 @@ class Usergroup(PluginCommandMixin, PluginThread):
             "UserGroupMembers",
             "(GroupId integer not null, UserId integer not null, primary key (GroupId, UserId))",
         )
+        # The primary key of UserGroupMembers does not cover lookups by user.
+        self._db.execute(self._create_members_index_sql, commit=True)
 
         self.command_parser: CommandParser = CommandParser()
         self.command_parser.add_subcommand(
@@ -116,9 +141,9 @@ class Usergroup(PluginCommandMixin, PluginThread):
                 [dict[str, Any], CommandParser.Args, CommandParser.Opts],
                 Response | Iterable[Response],
             ] = getattr(self, "_" + command)
-            self.logger.debug(f"executing subcommand: {command}")
-            self.logger.debug(f"args: {args}")
-            self.logger.debug(f"opts: {opts}")
+            self.logger.debug("executing subcommand: %s", command)
+            self.logger.debug("args: %s", args)
+            self.logger.debug("opts: %s", opts)
             return func(message, args, opts)
         else:
             return Response.command_not_found(message)
@@ -206,7 +231,8 @@ class Usergroup(PluginCommandMixin, PluginThread):
             return Response.privilege_err(message)
 
         failures: dict[str, list[str]] = {}
-        success: dict[str, list[str]] = {}
+        # Map the id of every user to the groups they have been added to.
+        success: dict[int, list[str]] = {}
 
         if len(args.users) == 0 or len(args.groups) == 0:
             return Response.build_message(
@@ -215,14 +241,29 @@ class Usergroup(PluginCommandMixin, PluginThread):
                 msg_type="private",
             )
 
-        for user in args.users:
-            success[user] = list()
-            failures[user] = list()
-            for group in args.groups:
-                if not self.add_user_to_group(user, group):
-                    failures[user].append(group)
-                else:
-                    success[user].append(group)
+        # Resolve every user and group only once for the whole command.
+        uids: dict[str, int | None] = {
+            user: self.user_id_by_identifier(user) for user in args.users
+        }
+        gids: dict[str, int | None] = {
+            group: self.group_id_by_identifier(group) for group in args.groups
+        }
+
+        # Commit all memberships at once.
+        with self._db.batch():
+            for user in args.users:
+                failures[user] = list()
+                uid = uids[user]
+                for group in args.groups:
+                    gid = gids[group]
+                    if (
+                        uid is None
+                        or gid is None
+                        or not self.add_user_to_group(uid, gid)
+                    ):
+                        failures[user].append(group)
+                    else:
+                        success.setdefault(uid, []).append(group)
 
         responses = []
 
@@ -237,28 +278,16 @@ class Usergroup(PluginCommandMixin, PluginThread):
                     )
                 )
 
-        for user, groups in success.items():
-            if len(groups) > 0:
-                uid = self.client.get_user_id_by_name(user)
-                if uid:
-                    groups_str = ", ".join([f"`{g}`" for g in groups])
-                    responses.append(
-                        Response.build_message(
-                            message=None,
-                            msg_type="private",
-                            content=f"Hey,\nYou have been added to the following user groups by @_**{message['sender_full_name']}|{message['sender_id']}**:\n{groups_str}",
-                            to=[uid],
-                        )
-                    )
-                else:
-                    groups_str = ", ".join(groups)
-                    responses.append(
-                        Response.build_message(
-                            message,
-                            f"Error: Could not find id for user {user}.",
-                            msg_type="private",
-                        )
-                    )
+        for uid, groups in success.items():
+            groups_str = ", ".join([f"`{g}`" for g in groups])
+            responses.append(
+                Response.build_message(
+                    message=None,
+                    msg_type="private",
+                    content=self._notification(message, "add", groups_str),
+                    to=[uid],
+                )
+            )
         responses.append(Response.ok(message))
         return responses
 
@@ -282,7 +311,7 @@ class Usergroup(PluginCommandMixin, PluginThread):
     def _remove(
         self, message: dict[str, Any], args: CommandParser.Args, _: CommandParser.Opts
     ) -> Response | Iterable[Response]:
-        user_id = None
+        user_id: int | None = None
 
         if args.user is not None:
             user_id = self.client.get_user_id_by_name(args.user)
@@ -298,69 +327,46 @@ class Usergroup(PluginCommandMixin, PluginThread):
         ):
             return Response.privilege_err(message)
 
+        # From here on, reuse the resolved user id instead of asking the
+        # Zulip server again.
         responses = []
-        if args.user is not None and args.group is not None:
-            self.remove_user_from_group(args.user, args.group)
-            uid = self.client.get_user_id_by_name(args.user)
-            if uid:
-                responses.append(
-                    Response.build_message(
-                        message=None,
-                        msg_type="private",
-                        content=f"Hey,\nYou have been removed to the following user group by @_**{message['sender_full_name']}|{message['sender_id']}**:\n`{args.group}`",
-                        to=[uid],
-                    )
+        if user_id is not None and args.group is not None:
+            self.remove_user_from_group(user_id, args.group)
+            responses.append(
+                Response.build_message(
+                    message=None,
+                    msg_type="private",
+                    content=self._notification(message, "remove", f"`{args.group}`"),
+                    to=[user_id],
                 )
-            else:
-                responses.append(
-                    Response.build_message(
-                        message,
-                        f"Error: Could not find id for user {args.user}.",
-                        msg_type="private",
-                    )
-                )
-        elif args.user is not None:
-            uid = self.client.get_user_id_by_name(args.user)
-            if not uid:
-                responses.append(
-                    Response.build_message(
-                        message,
-                        f"Error: Could not find id for user {args.user}.",
-                        msg_type="private",
-                    )
-                )
-            else:
-                groups = self.get_groups_for_user(args.user)
-                for gid in groups:
-                    self.remove_user_from_group(args.user, gid)
-                print(groups)
-                names = [
-                    g_dict["name"]
-                    for g_dict in [self.get_group_by_identifier(g) for g in groups]
-                    if g_dict
-                ]
-                print([self.get_group_by_identifier(g) for g in groups])
-                print("§" * 100)
-                names_str = ", ".join([f"`{n}`" for n in names])
-                responses.append(
-                    Response.build_message(
-                        message=None,
-                        msg_type="private",
-                        content=f"Hey,\nYou have been removed from the following user groups by @_**{message['sender_full_name']}|{message['sender_id']}**:\n[{names_str}]",
-                        to=[uid],
-                    )
+            )
+        elif user_id is not None:
+            names = self.remove_user_from_all_groups(user_id)
+            names_str = ", ".join([f"`{n}`" for n in names])
+            responses.append(
+                Response.build_message(
+                    message=None,
+                    msg_type="private",
+                    content=self._notification(
+                        message, "remove_all", f"[{names_str}]"
+                    ),
+                    to=[user_id],
                 )
+            )
         elif args.group is not None:
-            for member in self.get_group_members(args.group):
-                responses.append(
-                    Response.build_message(
-                        message=None,
-                        msg_type="private",
-                        content=f"Hey,\nYou have been removed from the following user group by @_**{message['sender_full_name']}|{message['sender_id']}**:\n`{args.group}`",
-                        to=[member],
+            content: str = self._notification(message, "remove", f"`{args.group}`")
+            gid: int | None = self.group_id_by_identifier(args.group)
+            if gid is not None:
+                for member in self.get_group_members(gid):
+                    responses.append(
+                        Response.build_message(
+                            message=None,
+                            msg_type="private",
+                            content=content,
+                            to=[member],
+                        )
                     )
-                )
-            self.delete_group(args.group)
+                self.delete_group(gid)
         else:
             return Response.build_message(
                 message,
@@ -371,47 +377,49 @@ class Usergroup(PluginCommandMixin, PluginThread):
         responses.append(Response.ok(message))
         return responses
 
+    def _notification(self, message: dict[str, Any], action: str, groups: str) -> str:
+        """Build the message notifying a user about a membership change.
+
+        Arguments:
+        ----------
+        message   The message of the command causing the change.
+        action    A key of _notification_actions.
+        groups    The formatted group name(s).
+        """
+        return self._notification_msg.format(
+            self._notification_actions[action],
+            message["sender_full_name"],
+            message["sender_id"],
+            groups,
+        )
+
     # TODO: replacement for zulip usergroups. Rreplace as soon as api allows bot requests for usergroups
     def get_groups(self) -> list[dict[str, Any]]:
-        res_groups = self._db.execute("select * from UserGroups")
-        if res_groups is None:
-            return []
-
-        groups: list[dict[str, Any]] = []
-        for group_id, group_name in res_groups:
-            memers_res = self._db.execute(
-                "select UserId from UserGroupMembers where GroupId = ?",
-                group_id,
-            )
-            members: list[int] = []
-            if memers_res is not None:
-                members = [t[0] for t in memers_res]
-            groups.append({"id": group_id, "name": group_name, "members": members})
+        # Fetch all groups together with their members in a single query.
+        groups: dict[int, dict[str, Any]] = {}
+        for group_id, group_name, user_id in self._db.iter_execute(
+            self._list_groups_members_sql
+        ):
+            group: dict[str, Any] | None = groups.get(group_id)
+            if group is None:
+                group = {"id": group_id, "name": group_name, "members": []}
+                groups[group_id] = group
+            if user_id is not None:
+                group["members"].append(user_id)
 
-        return groups
+        return list(groups.values())
 
     def create_group(self, name: str, _: str) -> bool:
-        self._db.execute(
-            "insert or ignore into UserGroups (UGroup) values (?)",
-            name,
-            commit=True,
-        )
+        self._db.execute(self._create_group_sql, name, commit=True)
         return True
 
     def delete_group(self, identifier: int | str) -> bool:
         gid = self.group_id_by_identifier(identifier)
         if gid is None:
             return False
-        self._db.execute(
-            "delete from UserGroups where GroupId = ?",
-            gid,
-            commit=True,
-        )
-        self._db.execute(
-            "delete from UserGroupMembers where GroupId = ?",
-            gid,
-            commit=True,
-        )
+        with self._db.batch():
+            self._db.execute(self._remove_group_sql, gid, commit=True)
+            self._db.execute(self._remove_group_members_sql, gid, commit=True)
         return True
 
     def remove_user_from_group(
@@ -421,14 +429,25 @@ class Usergroup(PluginCommandMixin, PluginThread):
         gid = self.group_id_by_identifier(group_identifier)
         if uid is None or gid is None:
             return False
-        self._db.execute(
-            "delete from UserGroupMembers where GroupId = ? and UserId = ?",
-            gid,
-            uid,
-            commit=True,
-        )
+        self._db.execute(self._remove_member_sql, gid, uid, commit=True)
         return True
 
+    def remove_user_from_all_groups(self, user_identifier: int | str) -> list[str]:
+        """Remove a user from all groups.
+
+        Return the names of the groups the user has been removed from.
+        """
+        uid = self.user_id_by_identifier(user_identifier)
+        if uid is None:
+            return []
+        with self._db.batch():
+            names: list[str] = [
+                name
+                for (name,) in self._db.execute(self._list_user_group_names_sql, uid)
+            ]
+            self._db.execute(self._remove_user_from_all_sql, uid, commit=True)
+        return names
+
     def add_user_to_group(
         self, user_identifier: int | str, group_identifier: int | str
     ) -> bool:
@@ -436,60 +455,35 @@ class Usergroup(PluginCommandMixin, PluginThread):
         gid = self.group_id_by_identifier(group_identifier)
         if uid is None or gid is None:
             return False
-        self._db.execute(
-            "insert or ignore into UserGroupMembers values (?, ?)",
-            gid,
-            uid,
-            commit=True,
-        )
+        self._db.execute(self._insert_member_sql, gid, uid, commit=True)
         return True
 
     def get_groups_for_user(self, user_identifier: int | str) -> list[int]:
         uid = self.user_id_by_identifier(user_identifier)
-        res = self._db.execute(
-            "select g.GroupId from UserGroups g, UserGroupMembers m where m.GroupId = g.GroupId and m.UserId = ?",
-            uid,
-        )
+        res = self._db.execute(self._list_user_groups_sql, uid)
         if not res or len(res) == 0:
             return []
         return [i[0] for i in res]
 
     def get_group_id_by_name(self, group_name: str) -> int | None:
-        res = self._db.execute(
-            "select GroupId from UserGroups where UGroup = ? LIMIT 1", group_name
-        )
+        res = self._db.execute(self._get_group_id_sql, group_name)
         if not res or len(res) == 0:
             return None
         i: int = res[0][0]
         return i
 
     def group_id_by_identifier(self, identifier: int | str) -> int | None:
-        print(type(identifier))
-        print(isinstance(identifier, int))
         if isinstance(identifier, int):
-            print(int(identifier))
-        if isinstance(identifier, int):
-            return int(identifier)
-
-        res = self._db.execute(
-            "select GroupId from UserGroups where UGroup = ? LIMIT 1", identifier
-        )
-        if not res or len(res) == 0:
-            return None
-        i: int = res[0][0]
-        return i
+            return identifier
+        return self.get_group_id_by_name(identifier)
 
     def get_group_by_identifier(self, identifier: int | str) -> dict[str, Any] | None:
         gid = self.group_id_by_identifier(identifier)
         if gid is None:
             return None
 
-        res_name = self._db.execute(
-            "select UGroup from UserGroups where GroupId = ? LIMIT 1", gid
-        )
-        res_members = self._db.execute(
-            "select UserId from UserGroupMembers where GroupId = ?", gid
-        )
+        res_name = self._db.execute(self._get_group_name_sql, gid)
+        res_members = self._db.execute(self._get_group_members_sql, gid)
         if res_members is None or res_name is None or len(res_name) == 0:
             return None
         g: dict[str, Any] = {
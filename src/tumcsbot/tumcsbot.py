@@ -12,11 +12,13 @@ a private message or a message starting with @mentioning the bot.
 
 import logging
 import signal
+import sys
+from functools import lru_cache
 from graphlib import TopologicalSorter
 from multiprocessing import SimpleQueue as SimpleQueueM
-from queue import SimpleQueue as SimpleQueueT
+from queue import Empty, SimpleQueue as SimpleQueueT
 from threading import Thread, current_thread
-from typing import Any, Callable, Iterable, Type, cast
+from typing import Any, Callable, Iterable, Type
 
 from tumcsbot import lib
 from tumcsbot.client import Client, SharedClient
@@ -26,10 +28,33 @@ from tumcsbot.plugin import (
     EventType,
     PluginContext,
     PluginProcess,
-    get_zulip_events_from_plugins,
 )
 
 
+@lru_cache(maxsize=1)
+def _plugin_order(
+    plugin_classes: tuple[Type[_Plugin], ...]
+) -> tuple[tuple[str, Type[_Plugin]], ...]:
+    """Sort the plugin classes using their dependency information.
+
+    Return (plugin name, plugin class) tuples in an order in which
+    every plugin comes after its dependencies.
+    """
+    plugin_class_dict: dict[str, Type[_Plugin]] = {}
+    plugin_graph: dict[str, set[str]] = {}
+    for plugin_class in plugin_classes:
+        name: str = plugin_class.plugin_name()
+        if name in plugin_class_dict:
+            raise ValueError(f"plugin {name} appears twice")
+        plugin_class_dict[name] = plugin_class
+        plugin_graph[name] = set(plugin_class.dependencies)
+
+    return tuple(
+        (name, plugin_class_dict[name])
+        for name in TopologicalSorter(plugin_graph).static_order()
+    )
+
+
 class _QueueForwarder(Thread):
     """Forward contents of one queue to another.
 
@@ -42,9 +67,10 @@ class _QueueForwarder(Thread):
         self.dest: "SimpleQueueT[Event]" = dest
 
     def run(self) -> None:
+        get: Callable[[], Event] = self.src.get
+        put: Callable[[Event], None] = self.dest.put
         while True:
-            event: Event = self.src.get()
-            self.dest.put(event)
+            put(get())
 
 
 class _RootClient(Client):
@@ -64,29 +90,28 @@ class _RootClient(Client):
             "PublicStreams",
             "(StreamName text primary key, Subscribed integer not null)",
         )
-        # Get previous data.
-        old_streams: dict[str, int] = dict(
-            cast(
-                Iterable[tuple[str, int]],
-                self._db.execute("select StreamName, Subscribed from PublicStreams"),
+        # Get current data.
+        stream_names: set[str] = set(self.get_public_stream_names(use_db=False))
+
+        # We do not compare the streams using lib.stream_names_equal here,
+        # because we store the stream names in the database as we receive
+        # them from Zulip. There is no user interaction involved.
+        with self._db.batch():
+            known: set[str] = {
+                stream_name
+                for (stream_name,) in self._db.iter_execute(
+                    "select StreamName from PublicStreams"
+                )
+            }
+            # Remove deprecated streams, keeping the state of the others.
+            self._db.executemany(
+                "delete from PublicStreams where StreamName = ?",
+                ((stream_name,) for stream_name in known - stream_names),
             )
-        )
-        # Clear table to prevent deprecated information.
-        self._db.execute("delete from PublicStreams")
-
-        # Fill in current data.
-        stream_names: list[str] = self.get_public_stream_names(use_db=False)
-        for stream_name in stream_names:
-            subscribed: bool = False
-            # We do not compare the streams using lib.stream_names_equal here,
-            # because we store the stream names in the database as we receive
-            # them from Zulip. There is no user interaction involved.
-            if stream_name in old_streams and old_streams[stream_name] == 1:
-                subscribed = True
-            self._db.execute(
-                "insert or ignore into PublicStreams values (?, ?)",
-                stream_name,
-                subscribed,
+            # Add new streams.
+            self._db.executemany(
+                "insert into PublicStreams values (?, 0)",
+                ((stream_name,) for stream_name in stream_names - known),
                 commit=True,
             )
 
@@ -106,18 +131,24 @@ class _ZulipEventListener(Thread):
         super().__init__(name="zulip_event_listener", daemon=True)
         self.events: list[str] = events
         self.queue: "SimpleQueueT[Event]" = queue
+        # Bound once, used for every incoming event in _push_event().
+        self._put: Callable[[Event], None] = queue.put
+        self._zulip: EventType = EventType.ZULIP
         # Init own Zulip client.
         self.client: Client = Client(config_file=zuliprc)
 
     def run(self) -> None:
         self.client.call_on_each_event(
-            lambda event: self.queue.put(
-                Event(sender="_root", type=EventType.ZULIP, data=event)
-            ),
-            event_types=self.events,
-            all_public_streams=True,
+            self._push_event, event_types=self.events, all_public_streams=True
         )
 
+    def _push_event(self, event: dict[str, Any]) -> None:
+        # Intern the event type, so the later lookups in the dispatch table
+        # can compare it by identity.
+        # Note that call_on_each_event() already drops heartbeat events.
+        event["type"] = sys.intern(event["type"])
+        self._put(Event("_root", self._zulip, event))
+
 
 class TumCSBot:
     """Main Bot class.
@@ -132,6 +163,9 @@ class TumCSBot:
     logfile       use LOGFILE for logging output
     """
 
+    # Maximum number of events taken from the central queue at once.
+    max_batch_size: int = 64
+
     def __init__(
         self,
         zuliprc: str,
@@ -142,6 +176,9 @@ class TumCSBot:
         self.events: list[str]
         self.plugins: dict[str, _Plugin] = {}
         self.plugins_stopped: dict[str, _Plugin] = {}
+        # Running plugins by the Zulip event types they listen for, see
+        # _get_zulip_dispatch().
+        self._zulip_dispatch: dict[str, tuple[_Plugin, ...]] | None = None
         self.restart: bool = False
         self.stopped: bool = False
 
@@ -156,15 +193,18 @@ class TumCSBot:
         # Init database handler.
         lib.DB.path = db_path
         # Ensure presence of Plugins table.
-        db: lib.DB = lib.DB()
-        db.checkout_table(
-            "Plugins", "(name text primary key, syntax text, description text)"
-        )
-        db.close()
+        with lib.DB() as db:
+            db.checkout_table(
+                "Plugins", "(name text primary key, syntax text, description text)"
+            )
 
         # Init own Zulip client which also inits the global DB tables for all
         # Zulip client objects.
         self.client = _RootClient(config_file=zuliprc)
+        # Used for every incoming message, see zulip_event_preprocess().
+        self._client_id: int = self.client.id
+        self._ping: str = self.client.ping
+        self._ping_len: int = self.client.ping_len
         # Init Zulip client to be (potentially) shared between plugins.
         self.shared_client = SharedClient(config_file=zuliprc)
 
@@ -190,19 +230,18 @@ class TumCSBot:
         current_thread().name = "_root"
 
         # Get the plugin classes and start the plugins in correct dependency order.
+        # This also collects the events to listen for.
         plugin_classes: Iterable[Type[_Plugin]] = lib.get_classes_from_path(
             "tumcsbot.plugins", _Plugin  # type: ignore
         )
         self.start_plugins(plugin_classes, zuliprc, logging_level)
 
-        # Get events to listen for.
-        self.events = get_zulip_events_from_plugins(plugin_classes)
         # Init the Zulip event listener.
         self._event_listener: _ZulipEventListener = _ZulipEventListener(
             zuliprc, self.events, self.event_queue
         )
         # Start the Zulip event listener.
-        logging.debug("start event listener, listening on events: %s", str(self.events))
+        logging.debug("start event listener, listening on events: %s", self.events)
         self._event_listener.start()
 
     def distribute_event(self, event: Event) -> None:
@@ -224,10 +263,29 @@ class TumCSBot:
                     )
             else:
                 logging.error("event.dest unknown: %s", event.dest)
+        elif event.type == EventType.ZULIP:
+            # Only hand Zulip events to the plugins listening for them.
+            for plugin in self._get_zulip_dispatch().get(event.data["type"], ()):
+                plugin.push_event(event)
         else:
             for plugin in self.plugins.values():
                 plugin.push_event(event)
 
+    def _get_zulip_dispatch(self) -> dict[str, tuple[_Plugin, ...]]:
+        """Map every Zulip event type to the running plugins listening for it.
+
+        The mapping is cached until a plugin is stopped or restarted.
+        """
+        if self._zulip_dispatch is None:
+            dispatch: dict[str, list[_Plugin]] = {}
+            for plugin in self.plugins.values():
+                for event_type in plugin.zulip_events:
+                    dispatch.setdefault(event_type, []).append(plugin)
+            self._zulip_dispatch = {
+                event_type: tuple(plugins) for event_type, plugins in dispatch.items()
+            }
+        return self._zulip_dispatch
+
     def exit_handler(self) -> None:
         """Stop the main loop if necessary."""
         logging.debug("exit handler")
@@ -243,6 +301,7 @@ class TumCSBot:
         plugin.start()
         self.plugins[name] = plugin
         del self.plugins_stopped[name]
+        self._zulip_dispatch = None
 
     def run(self) -> None:
         """Run the central event queue.
@@ -252,25 +311,38 @@ class TumCSBot:
         """
         logging.debug("start central queue")
 
-        while True:
-            event: Event = self.event_queue.get()
-            logging.debug("received event %s", str(event))
-
-            if self.stopped or event.type == EventType._EMPTY:
-                if event.type == EventType._EMPTY and event.sender == "restart":
-                    self.restart = True
-                self.stopped = True
-                break
-
-            if event.type == EventType.ZULIP:
-                if event.data["type"] == "heartbeat":
-                    continue
-                try:
-                    event.data = self.zulip_event_preprocess(event.data)
-                except Exception as exc:
-                    logging.exception(exc)
-
-            self.distribute_event(event)
+        while not self.stopped:
+            # Block for the next event, then also take the events which have
+            # been queued in the meantime (up to max_batch_size).
+            events: list[Event] = [self.event_queue.get()]
+            try:
+                while len(events) < self.max_batch_size:
+                    events.append(self.event_queue.get_nowait())
+            except Empty:
+                pass
+
+            # Check the logging level once per batch instead of per event.
+            debug: bool = logging.root.isEnabledFor(logging.DEBUG)
+
+            for event in events:
+                if debug:
+                    logging.debug("received event %s", event)
+
+                if self.stopped or event.type == EventType._EMPTY:
+                    if event.type == EventType._EMPTY and event.sender == "restart":
+                        self.restart = True
+                    self.stopped = True
+                    break
+
+                # Only messages may be commands, skip the preprocessing for
+                # all other Zulip events.
+                if event.type == EventType.ZULIP and event.data["type"] == "message":
+                    try:
+                        event.data = self.zulip_event_preprocess(event.data)
+                    except Exception as exc:
+                        logging.exception(exc)
+
+                self.distribute_event(event)
 
         logging.debug("stopping plugins ...")
         for plugin_name in self.plugins:
@@ -282,18 +354,15 @@ class TumCSBot:
     def start_plugins(
         self, plugin_classes: Iterable[Type[_Plugin]], zuliprc: str, logging_level: int
     ) -> None:
-        """Start the plugin threads / processes."""
-        # First, build the correct order using the dependency information.
-        plugin_class_dict: dict[str, Type[_Plugin]] = {
-            plugin_class.plugin_name(): plugin_class for plugin_class in plugin_classes
-        }
-        plugin_graph: dict[str, set[str]] = {
-            plugin_class.plugin_name(): set(plugin_class.dependencies)
-            for plugin_class in plugin_classes
-        }
-        for plugin_name in TopologicalSorter(plugin_graph).static_order():
+        """Start the plugin threads / processes.
+
+        Also set self.events to the Zulip events the plugins listen for.
+        """
+        events: set[str] = set()
+
+        for plugin_name, plugin_class in _plugin_order(tuple(plugin_classes)):
             logging.debug("start %s", plugin_name)
-            plugin_class = plugin_class_dict[plugin_name]
+            events.update(plugin_class.zulip_events)
 
             push_loopback: Callable[[Event], None]
             if issubclass(plugin_class, PluginProcess):
@@ -309,11 +378,12 @@ class TumCSBot:
                 plugin_context=PluginContext(zuliprc, push_loopback, logging_level),
                 client=client,
             )
-            if plugin_name in self.plugins:
-                raise ValueError(f"plugin {plugin.plugin_name()} appears twice")
             self.plugins[plugin_name] = plugin
+            self._zulip_dispatch = None
             plugin.start()
 
+        self.events = list(events)
+
     def stop_plugin(self, name: str, update_plugins_dicts: bool = True) -> None:
         """Stop a plugin given its name."""
         logging.debug("stop plugin %s ...", name)
@@ -324,6 +394,21 @@ class TumCSBot:
             return
         self.plugins_stopped[name] = plugin
         del self.plugins[name]
+        self._zulip_dispatch = None
+
+    def _is_only_pm_recipient(self, message: dict[str, Any]) -> bool:
+        """Check whether the bot is the only recipient of the given pm.
+
+        Specialized version of Client.is_only_pm_recipient for
+        zulip_event_preprocess, which has already checked the message
+        type and the sender.
+        """
+        # Note that the list of users who received the pm includes the sender.
+        recipients: list[dict[str, Any]] = message["display_recipient"]
+        return len(recipients) == 2 and (
+            recipients[0]["id"] == self._client_id
+            or recipients[1]["id"] == self._client_id
+        )
 
     def zulip_event_preprocess(self, event: dict[str, Any]) -> dict[str, Any]:
         """Preprocess a Zulip event dictionary.
@@ -341,41 +426,31 @@ class TumCSBot:
           command_name     The name of the command.
           command          The command without the name.
         """
-        startswithping: bool = False
-
-        if event["type"] == "message" and event["message"]["content"].startswith(
-            self.client.ping
-        ):
-            startswithping = True
-
-        if (
-            event["type"] != "message"
-            or event["message"]["sender_id"] == self.client.id
-            or (event["message"]["type"] != "private" and not startswithping)
-            or (
-                event["message"]["type"] == "private"
-                and (
-                    startswithping
-                    or not self.client.is_only_pm_recipient(event["message"])
-                )
-            )
-        ):
+        if event["type"] != "message":
             return event
 
-        content: str
         message: dict[str, Any] = event["message"]
+        if message["sender_id"] == self._client_id:
+            return event
+
+        content: str = message["content"]
+        startswithping: bool = content.startswith(self._ping)
+
+        if message["type"] == "private":
+            if startswithping or not self._is_only_pm_recipient(message):
+                return event
+        elif not startswithping:
+            return event
 
         if startswithping:
-            content = message["content"][self.client.ping_len :]
-        else:
-            content = message["content"]
+            content = content[self._ping_len :]
 
         cmd: list[str] = content.split(maxsplit=1)
-        logging.debug("received command line %s", str(cmd))
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug("received command line %s", cmd)
 
-        event["message"].update(
-            command_name=cmd[0] if len(cmd) > 0 else "",
-            command=cmd[1] if len(cmd) > 1 else "",
-        )
+        cmd_len: int = len(cmd)
+        message["command_name"] = cmd[0] if cmd_len > 0 else ""
+        message["command"] = cmd[1] if cmd_len > 1 else ""
 
         return event